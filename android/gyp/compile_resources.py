@@ -47,6 +47,12 @@ _PNG_WEBP_EXCLUSION_PATTERN = re.compile('|'.join([
     r'.*daydream_icon_.*\.png'
 ]))
 
+# There are resources targeting API-versions lower than our minapi. For
+# various reasons it's easier to let aapt2 ignore these than for us to
+# remove them from our build (e.g. it's from a 3rd party library).
+_AAPT2_COMPILE_IGNORED_WARNINGS_PATTERN = re.compile(
+    r'ignoring configuration .* for (styleable|attribute)')
+
 
 def _ParseArgs(args):
   """Parses command line options.
@@ -592,13 +598,10 @@ def _CompileSingleDep(index, dep_subdir, keep_predicate, aapt2_path,
       partial_path
   ]
 
-  # There are resources targeting API-versions lower than our minapi. For
-  # various reasons it's easier to let aapt2 ignore these than for us to
-  # remove them from our build (e.g. it's from a 3rd party library).
   build_utils.CheckOutput(
       compile_command,
       stderr_filter=lambda output: build_utils.FilterLines(
-          output, r'ignoring configuration .* for (styleable|attribute)'))
+          output, _AAPT2_COMPILE_IGNORED_WARNINGS_PATTERN))
 
   # Filtering these files is expensive, so only apply filters to the partials
   # that have been explicitly targeted.
@@ -741,9 +744,10 @@ def _PackageApk(options, build):
   logging.debug('Extracting resource .zips')
   dep_subdirs = []
   dep_subdir_overlay_set = set()
-  for dependency_res_zip in options.dependencies_res_zips:
-    extracted_dep_subdirs = resource_utils.ExtractDeps([dependency_res_zip],
-                                                       build.deps_dir)
+  dep_subdirs_per_zip = resource_utils.ExtractDepsPerZip(
+      options.dependencies_res_zips, build.deps_dir)
+  for dependency_res_zip, extracted_dep_subdirs in zip(
+      options.dependencies_res_zips, dep_subdirs_per_zip):
     dep_subdirs += extracted_dep_subdirs
     if dependency_res_zip in options.dependencies_res_zip_overlays:
       dep_subdir_overlay_set.update(extracted_dep_subdirs)
@@ -103,6 +103,7 @@ def _ZipResources(resource_dirs, zip_path, ignore_pattern):
       if os.path.exists(aar_source_info_path):
         attributed_aar = jar_info_utils.ReadAarSourceInfo(aar_source_info_path)
 
+    zip_prefix = '{}_{}/'.format(index, os.path.basename(resource_dir))
     for path, archive_path in resource_utils.IterResourceFilesInDirectories(
         [resource_dir], ignore_pattern):
       attributed_path = path
@@ -112,9 +113,7 @@ def _ZipResources(resource_dirs, zip_path, ignore_pattern):
       # Use the non-prefixed archive_path in the .info file.
       path_info.AddMapping(archive_path, attributed_path)
 
-      resource_dir_name = os.path.basename(resource_dir)
-      archive_path = '{}_{}/{}'.format(index, resource_dir_name, archive_path)
-      files_to_zip.append((archive_path, path))
+      files_to_zip.append((zip_prefix + archive_path, path))
 
   path_info.Write(zip_path + '.info')
 
@@ -207,8 +207,8 @@ def FilterLines(output, filter_string):
 
   Args:
     output: Executable output as from build_utils.CheckOutput.
-    filter_string: An RE string that will filter (remove) matching
-        lines from |output|.
+    filter_string: An RE string (or compiled RE) that will filter (remove)
+        matching lines from |output|.
 
   Returns:
     The filtered output, as a single string.
@@ -16,12 +16,7 @@ import zipfile
 from xml.etree import ElementTree
 
 import util.build_utils as build_utils
-
-_SOURCE_ROOT = os.path.abspath(
-    os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
-# Import jinja2 from third_party/jinja2
-sys.path.insert(1, os.path.join(_SOURCE_ROOT, 'third_party'))
-from jinja2 import Template # pylint: disable=F0401
+import util.parallel as parallel
 
 
 # A variation of these maps also exists in:
@@ -198,10 +193,12 @@ def DeduceResourceDirsFromFileList(resource_files):
   # Thus the order must be maintained to prevent non-deterministic and possibly
   # flakey builds.
   resource_dirs = []
+  seen_dirs = set()
   for resource_path in resource_files:
     # Resources are always 1 directory deep under res/.
     res_dir = os.path.dirname(os.path.dirname(resource_path))
-    if res_dir not in resource_dirs:
+    if res_dir not in seen_dirs:
+      seen_dirs.add(res_dir)
       resource_dirs.append(res_dir)
 
   # Check if any resource_dirs are children of other ones. This indicates that a
@@ -227,15 +224,13 @@ def IterResourceFilesInDirectories(directories,
   globs = _GenerateGlobs(ignore_pattern)
   for d in directories:
     for root, _, files in os.walk(d):
+      parent_dir = os.path.relpath(root, d)
+      prefix = '' if parent_dir == '.' else parent_dir + os.sep
       for f in files:
-        archive_path = f
-        parent_dir = os.path.relpath(root, d)
-        if parent_dir != '.':
-          archive_path = os.path.join(parent_dir, f)
-        path = os.path.join(root, f)
+        archive_path = prefix + f
         if build_utils.MatchesGlob(archive_path, globs):
           continue
-        yield path, archive_path
+        yield os.path.join(root, f), archive_path
 
 
 class ResourceInfoFile(object):
@@ -311,29 +306,50 @@ class ResourceInfoFile(object):
       info_file.writelines(sorted(lines))
 
 
+# Matches a single line of an R.txt file, e.g.:
+#   int[] styleable SnackbarLayout { 0x0101011f, 0x7f010076 }
+_RE_TEXT_SYMBOL_LINE = re.compile(r'(int(?:\[\])?) (\w+) (\w+) (.+)$')
+
+
 def _ParseTextSymbolsFile(path, fix_package_ids=False):
-  """Given an R.txt file, returns a list of _TextSymbolEntry.
+  """Given an R.txt file, yields a _TextSymbolEntry for each of its lines.
 
   Args:
     path: Input file path.
     fix_package_ids: if True, 0x00 and 0x02 package IDs read from the file
       will be fixed to 0x7f.
-  Returns:
-    A list of _TextSymbolEntry instances.
+  Yields:
+    _TextSymbolEntry instances, in file order.
   Raises:
     Exception: An unexpected line was detected in the input.
   """
-  ret = []
+  match_line = _RE_TEXT_SYMBOL_LINE.match
   with open(path) as f:
-    for line in f:
-      m = re.match(r'(int(?:\[\])?) (\w+) (\w+) (.+)$', line)
-      if not m:
-        raise Exception('Unexpected line in R.txt: %s' % line)
-      java_type, resource_type, name, value = m.groups()
-      if fix_package_ids:
-        value = _FixPackageIds(value)
-      ret.append(_TextSymbolEntry(java_type, resource_type, name, value))
-  return ret
+    data = f.read()
+  for line in data.splitlines():
+    m = match_line(line)
+    if not m:
+      raise Exception('Unexpected line in R.txt: %s' % line)
+    java_type, resource_type, name, value = m.groups()
+    if fix_package_ids:
+      value = _FixPackageIds(value)
+    yield _TextSymbolEntry(java_type, resource_type, name, value)
+
+
+def _ParseTextSymbolKeys(path):
+  """Given an R.txt file, yields a (resource_type, name) tuple for each line.
+
+  Cheaper than _ParseTextSymbolsFile() for callers that do not need the
+  resource values. Lines are validated by the same _RE_TEXT_SYMBOL_LINE.
+  """
+  match_line = _RE_TEXT_SYMBOL_LINE.match
+  with open(path) as f:
+    data = f.read()
+  for line in data.splitlines():
+    m = match_line(line)
+    if not m:
+      raise Exception('Unexpected line in R.txt: %s' % line)
+    yield m.group(2, 3)
 
 
 def _FixPackageIds(resource_value):
@@ -350,15 +366,15 @@ def _FixPackageIds(resource_value):
 
 def _GetRTxtResourceNames(r_txt_path):
   """Parse an R.txt file and extract the set of resource names from it."""
-  return {entry.name for entry in _ParseTextSymbolsFile(r_txt_path)}
+  return {name for _, name in _ParseTextSymbolKeys(r_txt_path)}
 
 
 def GetRTxtStringResourceNames(r_txt_path):
   """Parse an R.txt file and the list of its string resource names."""
   return sorted({
-      entry.name
-      for entry in _ParseTextSymbolsFile(r_txt_path)
-      if entry.resource_type == 'string'
+      name
+      for resource_type, name in _ParseTextSymbolKeys(r_txt_path)
+      if resource_type == 'string'
   })
 
 
@@ -374,9 +390,9 @@ def GenerateStringResourcesAllowList(module_r_txt_path, allowlist_r_txt_path):
     |module_r_txt_path| that are also listed by name in |allowlist_r_txt_path|.
   """
   allowlisted_names = {
-      entry.name
-      for entry in _ParseTextSymbolsFile(allowlist_r_txt_path)
-      if entry.resource_type == 'string'
+      name
+      for resource_type, name in _ParseTextSymbolKeys(allowlist_r_txt_path)
+      if resource_type == 'string'
   }
   return {
       int(entry.value, 0): entry.name
@@ -465,7 +481,8 @@ class RJavaBuildOptions:
     if self.final_package_id is None:
       return
 
-    entries = _ParseTextSymbolsFile(r_txt_path)
+    # Read all entries before the file is truncated for writing.
+    entries = list(_ParseTextSymbolsFile(r_txt_path))
     with open(r_txt_path, 'w') as f:
       for entry in entries:
         value = entry.value
@@ -514,7 +531,8 @@ def CreateRJavaFiles(srcjar_dir,
       from the root R java file.
     main_r_txt_file: The main R.txt file containing the valid values
       of _all_ resource IDs.
-    extra_res_packages: A list of extra package names.
+    extra_res_packages: A list of extra package names. Package names that
+      appear several times only get a single R.java file.
     rjava_build_options: An RJavaBuildOptions instance that controls how
       exactly the R.java file is generated.
     srcjar_out: Path of desired output srcjar.
@@ -526,14 +544,17 @@ def CreateRJavaFiles(srcjar_dir,
       is identical to custom_root_package_name.
       (eg. for vr grandparent_custom_package_name would be "base")
     extra_main_r_text_files: R.txt files to be added to the root R.java file.
-  Raises:
-    Exception if a package name appears several times in |extra_res_packages|
   """
   rjava_build_options._MaybeRewriteRTxtPackageIds(main_r_txt_file)
 
-  packages = list(extra_res_packages)
+  packages = []
+  seen_packages = set()
+  for extra_package in extra_res_packages:
+    if extra_package not in seen_packages:
+      seen_packages.add(extra_package)
+      packages.append(extra_package)
 
-  if package and package not in packages:
+  if package and package not in seen_packages:
     # Sometimes, an apk target and a resources target share the same
     # AndroidManifest.xml and thus |package| will already be in |packages|.
     packages.append(package)
@@ -541,7 +562,8 @@ def CreateRJavaFiles(srcjar_dir,
   # Map of (resource_type, name) -> Entry.
   # Contains the correct values for resources.
   all_resources = {}
-  all_resources_by_type = collections.defaultdict(list)
+  # Map of resource_type -> [Entry], in R.txt order.
+  all_resources_by_type = {}
 
   main_r_text_files = [main_r_txt_file]
   if extra_main_r_text_files:
@@ -556,7 +578,7 @@ def CreateRJavaFiles(srcjar_dir,
                                                    all_resources[entry_key]))
       else:
         all_resources[entry_key] = entry
-        all_resources_by_type[entry.resource_type].append(entry)
+        all_resources_by_type.setdefault(entry.resource_type, []).append(entry)
         assert entry.resource_type in _ALL_RESOURCE_TYPES, (
             'Unknown resource type: %s, add to _ALL_RESOURCE_TYPES!' %
             entry.resource_type)
@@ -572,11 +594,9 @@ def CreateRJavaFiles(srcjar_dir,
   root_r_java_dir = os.path.join(srcjar_dir, *root_r_java_package.split('.'))
   build_utils.MakeDirectory(root_r_java_dir)
   root_r_java_path = os.path.join(root_r_java_dir, 'R.java')
-  root_java_file_contents = _RenderRootRJavaSource(
-      root_r_java_package, all_resources_by_type, rjava_build_options,
-      grandparent_custom_package_name)
   with open(root_r_java_path, 'w') as f:
-    f.write(root_java_file_contents)
+    _WriteRootRJavaSource(f, root_r_java_package, all_resources_by_type,
+                          rjava_build_options, grandparent_custom_package_name)
 
   for package in packages:
     _CreateRJavaSourceFile(srcjar_dir, package, root_r_java_package,
@@ -612,136 +632,127 @@ def _GetNonSystemIndex(entry):
 
 def _RenderRJavaSource(package, root_r_java_package, rjava_build_options):
   """Generates the contents of a R.java file."""
-  template = Template(
-      """/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
-
-package {{ package }};
-
-public final class R {
-    {% for resource_type in resource_types %}
-    public static final class {{ resource_type }} extends
-            {{ root_package }}.R.{{ resource_type }} {}
-    {% endfor %}
-    {% if has_on_resources_loaded %}
-    public static void onResourcesLoaded(int packageId) {
-        {{ root_package }}.R.onResourcesLoaded(packageId);
-    }
-    {% endif %}
-}
-""",
-      trim_blocks=True,
-      lstrip_blocks=True)
-
-  return template.render(
-      package=package,
-      resource_types=sorted(_ALL_RESOURCE_TYPES),
-      root_package=root_r_java_package,
-      has_on_resources_loaded=rjava_build_options.has_on_resources_loaded)
+  lines = [
+      '/* AUTO-GENERATED FILE.  DO NOT MODIFY. */',
+      '',
+      'package {};'.format(package),
+      '',
+      'public final class R {',
+  ]
+  for resource_type in sorted(_ALL_RESOURCE_TYPES):
+    lines.append(
+        '    public static final class {} extends'.format(resource_type))
+    lines.append('            {}.R.{} {{}}'.format(root_r_java_package,
+                                                  resource_type))
+  if rjava_build_options.has_on_resources_loaded:
+    lines.append('    public static void onResourcesLoaded(int packageId) {')
+    lines.append('        {}.R.onResourcesLoaded(packageId);'.format(
+        root_r_java_package))
+    lines.append('    }')
+  lines.append('}')
+  return '\n'.join(lines)
 
 
 def GetCustomPackagePath(package_name):
   return 'gen.' + package_name + '_module'
 
 
-def _RenderRootRJavaSource(package, all_resources_by_type, rjava_build_options,
-                           grandparent_custom_package_name):
-  """Render an R.java source file. See _CreateRJaveSourceFile for args info."""
-  final_resources_by_type = collections.defaultdict(list)
-  non_final_resources_by_type = collections.defaultdict(list)
+def _WriteRootRJavaSource(f, package, all_resources_by_type,
+                          rjava_build_options, grandparent_custom_package_name):
+  """Writes a root R.java source file to |f|, one line at a time.
+
+  See _CreateRJaveSourceFile for args info.
+  """
+  final_resources_by_type = {}
+  non_final_resources_by_type = {}
   for res_type, resources in all_resources_by_type.iteritems():
+    final_resources = []
+    non_final_resources = []
     for entry in resources:
       # Entries in stylable that are not int[] are not actually resource ids
       # but constants.
       if rjava_build_options._IsResourceFinal(entry):
-        final_resources_by_type[res_type].append(entry)
+        final_resources.append(entry)
       else:
-        non_final_resources_by_type[res_type].append(entry)
+        non_final_resources.append(entry)
+    final_resources_by_type[res_type] = final_resources
+    non_final_resources_by_type[res_type] = non_final_resources
 
-  # Keep these assignments all on one line to make diffing against regular
-  # aapt-generated files easier.
-  create_id = ('{{ e.resource_type }}.{{ e.name }} ^= packageIdTransform;')
-  create_id_arr = ('{{ e.resource_type }}.{{ e.name }}[i] ^='
-                   ' packageIdTransform;')
-  for_loop_condition = ('int i = {{ startIndex(e) }}; i < '
-                        '{{ e.resource_type }}.{{ e.name }}.length; ++i')
-
-  # Here we diverge from what aapt does. Because we have so many
-  # resources, the onResourcesLoaded method was exceeding the 64KB limit that
-  # Java imposes. For this reason we split onResourcesLoaded into different
-  # methods for each resource type.
-  extends_string = ''
   dep_path = ''
   if grandparent_custom_package_name:
-    extends_string = 'extends {{ parent_path }}.R.{{ resource_type }} '
     dep_path = GetCustomPackagePath(grandparent_custom_package_name)
 
-  template = Template("""/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
-
-package {{ package }};
-
-public final class R {
-    {% for resource_type in resource_types %}
-    public static class {{ resource_type }} """ + extends_string + """ {
-        {% for e in final_resources[resource_type] %}
-        public static final {{ e.java_type }} {{ e.name }} = {{ e.value }};
-        {% endfor %}
-        {% for e in non_final_resources[resource_type] %}
-            {% if e.value != '0' %}
-        public static {{ e.java_type }} {{ e.name }} = {{ e.value }};
-            {% else %}
-        public static {{ e.java_type }} {{ e.name }};
-            {% endif %}
-        {% endfor %}
-    }
-    {% endfor %}
-    {% if has_on_resources_loaded %}
-      {% if fake_on_resources_loaded %}
-    public static void onResourcesLoaded(int packageId) {
-    }
-      {% else %}
-    private static boolean sResourcesDidLoad;
-    public static void onResourcesLoaded(int packageId) {
-        if (sResourcesDidLoad) {
-            return;
-        }
-        sResourcesDidLoad = true;
-        int packageIdTransform = (packageId ^ 0x7f) << 24;
-        {% for resource_type in resource_types %}
-        onResourcesLoaded{{ resource_type|title }}(packageIdTransform);
-        {% for e in non_final_resources[resource_type] %}
-        {% if e.java_type == 'int[]' %}
-        for(""" + for_loop_condition + """) {
-            """ + create_id_arr + """
-        }
-        {% endif %}
-        {% endfor %}
-        {% endfor %}
-    }
-    {% for res_type in resource_types %}
-    private static void onResourcesLoaded{{ res_type|title }} (
-            int packageIdTransform) {
-        {% for e in non_final_resources[res_type] %}
-        {% if res_type != 'styleable' and e.java_type != 'int[]' %}
-        """ + create_id + """
-        {% endif %}
-        {% endfor %}
-    }
-    {% endfor %}
-      {% endif %}
-    {% endif %}
-}
-""",
-                      trim_blocks=True,
-                      lstrip_blocks=True)
-  return template.render(
-      package=package,
-      resource_types=sorted(_ALL_RESOURCE_TYPES),
-      has_on_resources_loaded=rjava_build_options.has_on_resources_loaded,
-      fake_on_resources_loaded=rjava_build_options.fake_on_resources_loaded,
-      final_resources=final_resources_by_type,
-      non_final_resources=non_final_resources_by_type,
-      startIndex=_GetNonSystemIndex,
-      parent_path=dep_path)
+  write = f.write
+  resource_types = sorted(_ALL_RESOURCE_TYPES)
+  write('/* AUTO-GENERATED FILE.  DO NOT MODIFY. */\n'
+        '\n'
+        'package {};\n'
+        '\n'
+        'public final class R {{\n'.format(package))
+  for resource_type in resource_types:
+    extends_string = ''
+    if dep_path:
+      extends_string = 'extends {}.R.{} '.format(dep_path, resource_type)
+    write('    public static class {} {} {{\n'.format(resource_type,
+                                                     extends_string))
+    for e in final_resources_by_type.get(resource_type, ()):
+      write('        public static final {} {} = {};\n'.format(
+          e.java_type, e.name, e.value))
+    for e in non_final_resources_by_type.get(resource_type, ()):
+      if e.value != '0':
+        write('        public static {} {} = {};\n'.format(
+            e.java_type, e.name, e.value))
+      else:
+        write('        public static {} {};\n'.format(e.java_type, e.name))
+    write('    }\n')
+
+  if rjava_build_options.has_on_resources_loaded:
+    if rjava_build_options.fake_on_resources_loaded:
+      write('    public static void onResourcesLoaded(int packageId) {\n'
+            '    }\n')
+    else:
+      _WriteOnResourcesLoaded(write, resource_types,
+                              non_final_resources_by_type)
+  write('}')
+
+
+def _WriteOnResourcesLoaded(write, resource_types, non_final_resources_by_type):
+  """Writes the onResourcesLoaded() methods of a shared-library root R.java.
+
+  Only needed for --shared-resources / --app-as-shared-lib targets, where
+  non-final resource IDs must be rewritten with the runtime package ID.
+  """
+  # Here we diverge from what aapt does. Because we have so many
+  # resources, the onResourcesLoaded method was exceeding the 64KB limit
+  # that Java imposes. For this reason we split onResourcesLoaded into
+  # different methods for each resource type.
+  write('    private static boolean sResourcesDidLoad;\n'
+        '    public static void onResourcesLoaded(int packageId) {\n'
+        '        if (sResourcesDidLoad) {\n'
+        '            return;\n'
+        '        }\n'
+        '        sResourcesDidLoad = true;\n'
+        '        int packageIdTransform = (packageId ^ 0x7f) << 24;\n')
+  for resource_type in resource_types:
+    write('        onResourcesLoaded{}(packageIdTransform);\n'.format(
+        resource_type.title()))
+    for e in non_final_resources_by_type.get(resource_type, ()):
+      if e.java_type == 'int[]':
+        # Keep these assignments all on one line to make diffing against
+        # regular aapt-generated files easier.
+        write('        for(int i = {}; i < {}.{}.length; ++i) {{\n'
+              '            {}.{}[i] ^= packageIdTransform;\n'
+              '        }}\n'.format(_GetNonSystemIndex(e), e.resource_type,
+                                     e.name, e.resource_type, e.name))
+  write('    }\n')
+  for res_type in resource_types:
+    write('    private static void onResourcesLoaded{} (\n'
+          '            int packageIdTransform) {{\n'.format(res_type.title()))
+    for e in non_final_resources_by_type.get(res_type, ()):
+      if res_type != 'styleable' and e.java_type != 'int[]':
+        write('        {}.{} ^= packageIdTransform;\n'.format(
+            e.resource_type, e.name))
+    write('    }\n')
 
 
 def ExtractBinaryManifestValues(aapt2_path, apk_path):
@@ -800,6 +811,19 @@ def _HasMultipleResDirs(zip_path):
     return z.comment == MULTIPLE_RES_MAGIC_STRING
 
 
+def _ExtractDep(dep_zip, subdir, subdirname):
+  """Extracts |dep_zip| into |subdir| and returns its resource directories."""
+  build_utils.ExtractAll(dep_zip, path=subdir)
+  if _HasMultipleResDirs(dep_zip):
+    # basename of the directory is used to create a zip during resource
+    # compilation, include the path in the basename to help blame errors on
+    # the correct target. For example directory 0_res may be renamed
+    # chrome_android_chrome_app_java_resources_0_res pointing to the name and
+    # path of the android_resources target from whence it came.
+    return _RenameSubdirsWithPrefix(subdir, subdirname)
+  return [subdir]
+
+
 def ExtractDeps(dep_zips, deps_dir):
   """Extract a list of resource dependency zip files.
 
@@ -814,24 +838,33 @@ def ExtractDeps(dep_zips, deps_dir):
     Exception: If a sub-directory already exists with the same name before
       extraction.
   """
-  dep_subdirs = []
+  return list(
+      itertools.chain.from_iterable(ExtractDepsPerZip(dep_zips, deps_dir)))
+
+
+def ExtractDepsPerZip(dep_zips, deps_dir):
+  """Like ExtractDeps(), but returns one list of sub-directories per zip.
+
+  Zips are extracted concurrently, since each one goes to its own directory.
+
+  Returns:
+    A list with, for each entry of |dep_zips|, the list of sub-directory
+    paths it was extracted to.
+  """
+  extract_args = []
+  subdirnames = set()
   for z in dep_zips:
     subdirname = z.replace(os.path.sep, '_')
     subdir = os.path.join(deps_dir, subdirname)
-    if os.path.exists(subdir):
+    if subdirname in subdirnames or os.path.exists(subdir):
       raise Exception('Resource zip name conflict: ' + subdirname)
-    build_utils.ExtractAll(z, path=subdir)
-    if _HasMultipleResDirs(z):
-      # basename of the directory is used to create a zip during resource
-      # compilation, include the path in the basename to help blame errors on
-      # the correct target. For example directory 0_res may be renamed
-      # chrome_android_chrome_app_java_resources_0_res pointing to the name and
-      # path of the android_resources target from whence it came.
-      subdir_subdirs = _RenameSubdirsWithPrefix(subdir, subdirname)
-      dep_subdirs.extend(subdir_subdirs)
-    else:
-      dep_subdirs.append(subdir)
-  return dep_subdirs
+    subdirnames.add(subdirname)
+    extract_args.append((z, subdir, subdirname))
+
+  if len(extract_args) > 1:
+    return list(parallel.BulkForkAndCall(_ExtractDep, extract_args))
+  # Not worth a fork() for a single zip.
+  return [_ExtractDep(*args) for args in extract_args]
 
 
 class _ResourceBuildContext(object):
@@ -935,11 +968,10 @@ def HandleCommonOptions(options):
     options: the result of parse_args() on the parser returned by
         ResourceArgsParser(). This function updates a few common fields.
   """
-  options.include_resources = [build_utils.ParseGnList(r) for r in
-                               options.include_resources]
   # Flatten list of include resources list to make it easier to use.
-  options.include_resources = [r for resources in options.include_resources
-                               for r in resources]
+  options.include_resources = list(
+      itertools.chain.from_iterable(
+          build_utils.ParseGnList(r) for r in options.include_resources))
 
   options.dependencies_res_zips = (
       build_utils.ParseGnList(options.dependencies_res_zips))
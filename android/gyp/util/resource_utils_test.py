@@ -8,6 +8,7 @@ import collections
 import os
 import sys
 import unittest
+import zipfile
 
 sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
@@ -102,6 +103,529 @@ _TEST_R_TXT_STRING_RESOURCE_NAMES = sorted([
 ])
 
 
+# R.txt used to generate the R.java files below. Its 0x00 package ID is
+# written out as 0x7f.
+_TEST_R_JAVA_R_TXT = r'''int anim abc_fade_in 0x7f050000
+int attr actionBarStyle 0x000100e2
+int string app_name 0x7f0c0105
+int[] styleable SnackbarLayout { 0x0101011f, 0x7f010076 }
+int styleable SnackbarLayout_android_maxWidth 0
+int styleable SnackbarLayout_elevation 1
+'''
+
+_TEST_ROOT_R_JAVA = '''/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
+
+package gen._foo.srcjar;
+
+public final class R {
+    public static class anim  {
+        public static final int abc_fade_in = 0x7f050000;
+    }
+    public static class animator  {
+    }
+    public static class array  {
+    }
+    public static class attr  {
+        public static final int actionBarStyle = 0x7f0100e2;
+    }
+    public static class bool  {
+    }
+    public static class color  {
+    }
+    public static class dimen  {
+    }
+    public static class drawable  {
+    }
+    public static class font  {
+    }
+    public static class fraction  {
+    }
+    public static class id  {
+    }
+    public static class integer  {
+    }
+    public static class interpolator  {
+    }
+    public static class layout  {
+    }
+    public static class menu  {
+    }
+    public static class mipmap  {
+    }
+    public static class plurals  {
+    }
+    public static class raw  {
+    }
+    public static class string  {
+        public static final int app_name = 0x7f0c0105;
+    }
+    public static class style  {
+    }
+    public static class styleable  {
+        public static final int[] SnackbarLayout = { 0x0101011f, 0x7f010076 };
+        public static final int SnackbarLayout_android_maxWidth = 0;
+        public static final int SnackbarLayout_elevation = 1;
+    }
+    public static class transition  {
+    }
+    public static class xml  {
+    }
+}'''
+
+_TEST_PACKAGE_R_JAVA = '''/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
+
+package org.chromium.foo;
+
+public final class R {
+    public static final class anim extends
+            gen._foo.srcjar.R.anim {}
+    public static final class animator extends
+            gen._foo.srcjar.R.animator {}
+    public static final class array extends
+            gen._foo.srcjar.R.array {}
+    public static final class attr extends
+            gen._foo.srcjar.R.attr {}
+    public static final class bool extends
+            gen._foo.srcjar.R.bool {}
+    public static final class color extends
+            gen._foo.srcjar.R.color {}
+    public static final class dimen extends
+            gen._foo.srcjar.R.dimen {}
+    public static final class drawable extends
+            gen._foo.srcjar.R.drawable {}
+    public static final class font extends
+            gen._foo.srcjar.R.font {}
+    public static final class fraction extends
+            gen._foo.srcjar.R.fraction {}
+    public static final class id extends
+            gen._foo.srcjar.R.id {}
+    public static final class integer extends
+            gen._foo.srcjar.R.integer {}
+    public static final class interpolator extends
+            gen._foo.srcjar.R.interpolator {}
+    public static final class layout extends
+            gen._foo.srcjar.R.layout {}
+    public static final class menu extends
+            gen._foo.srcjar.R.menu {}
+    public static final class mipmap extends
+            gen._foo.srcjar.R.mipmap {}
+    public static final class plurals extends
+            gen._foo.srcjar.R.plurals {}
+    public static final class raw extends
+            gen._foo.srcjar.R.raw {}
+    public static final class string extends
+            gen._foo.srcjar.R.string {}
+    public static final class style extends
+            gen._foo.srcjar.R.style {}
+    public static final class styleable extends
+            gen._foo.srcjar.R.styleable {}
+    public static final class transition extends
+            gen._foo.srcjar.R.transition {}
+    public static final class xml extends
+            gen._foo.srcjar.R.xml {}
+}'''
+
+_TEST_SHARED_ROOT_R_JAVA = '''/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
+
+package gen._foo.srcjar;
+
+public final class R {
+    public static class anim  {
+        public static int abc_fade_in = 0x7f050000;
+    }
+    public static class animator  {
+    }
+    public static class array  {
+    }
+    public static class attr  {
+        public static int actionBarStyle = 0x7f0100e2;
+    }
+    public static class bool  {
+    }
+    public static class color  {
+    }
+    public static class dimen  {
+    }
+    public static class drawable  {
+    }
+    public static class font  {
+    }
+    public static class fraction  {
+    }
+    public static class id  {
+    }
+    public static class integer  {
+    }
+    public static class interpolator  {
+    }
+    public static class layout  {
+    }
+    public static class menu  {
+    }
+    public static class mipmap  {
+    }
+    public static class plurals  {
+    }
+    public static class raw  {
+    }
+    public static class string  {
+        public static int app_name = 0x7f0c0105;
+    }
+    public static class style  {
+    }
+    public static class styleable  {
+        public static final int SnackbarLayout_android_maxWidth = 0;
+        public static final int SnackbarLayout_elevation = 1;
+        public static int[] SnackbarLayout = { 0x0101011f, 0x7f010076 };
+    }
+    public static class transition  {
+    }
+    public static class xml  {
+    }
+    private static boolean sResourcesDidLoad;
+    public static void onResourcesLoaded(int packageId) {
+        if (sResourcesDidLoad) {
+            return;
+        }
+        sResourcesDidLoad = true;
+        int packageIdTransform = (packageId ^ 0x7f) << 24;
+        onResourcesLoadedAnim(packageIdTransform);
+        onResourcesLoadedAnimator(packageIdTransform);
+        onResourcesLoadedArray(packageIdTransform);
+        onResourcesLoadedAttr(packageIdTransform);
+        onResourcesLoadedBool(packageIdTransform);
+        onResourcesLoadedColor(packageIdTransform);
+        onResourcesLoadedDimen(packageIdTransform);
+        onResourcesLoadedDrawable(packageIdTransform);
+        onResourcesLoadedFont(packageIdTransform);
+        onResourcesLoadedFraction(packageIdTransform);
+        onResourcesLoadedId(packageIdTransform);
+        onResourcesLoadedInteger(packageIdTransform);
+        onResourcesLoadedInterpolator(packageIdTransform);
+        onResourcesLoadedLayout(packageIdTransform);
+        onResourcesLoadedMenu(packageIdTransform);
+        onResourcesLoadedMipmap(packageIdTransform);
+        onResourcesLoadedPlurals(packageIdTransform);
+        onResourcesLoadedRaw(packageIdTransform);
+        onResourcesLoadedString(packageIdTransform);
+        onResourcesLoadedStyle(packageIdTransform);
+        onResourcesLoadedStyleable(packageIdTransform);
+        for(int i = 1; i < styleable.SnackbarLayout.length; ++i) {
+            styleable.SnackbarLayout[i] ^= packageIdTransform;
+        }
+        onResourcesLoadedTransition(packageIdTransform);
+        onResourcesLoadedXml(packageIdTransform);
+    }
+    private static void onResourcesLoadedAnim (
+            int packageIdTransform) {
+        anim.abc_fade_in ^= packageIdTransform;
+    }
+    private static void onResourcesLoadedAnimator (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedArray (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedAttr (
+            int packageIdTransform) {
+        attr.actionBarStyle ^= packageIdTransform;
+    }
+    private static void onResourcesLoadedBool (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedColor (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedDimen (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedDrawable (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedFont (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedFraction (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedId (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedInteger (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedInterpolator (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedLayout (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedMenu (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedMipmap (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedPlurals (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedRaw (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedString (
+            int packageIdTransform) {
+        string.app_name ^= packageIdTransform;
+    }
+    private static void onResourcesLoadedStyle (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedStyleable (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedTransition (
+            int packageIdTransform) {
+    }
+    private static void onResourcesLoadedXml (
+            int packageIdTransform) {
+    }
+}'''
+
+_TEST_SHARED_PACKAGE_R_JAVA = '''/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
+
+package org.chromium.foo;
+
+public final class R {
+    public static final class anim extends
+            gen._foo.srcjar.R.anim {}
+    public static final class animator extends
+            gen._foo.srcjar.R.animator {}
+    public static final class array extends
+            gen._foo.srcjar.R.array {}
+    public static final class attr extends
+            gen._foo.srcjar.R.attr {}
+    public static final class bool extends
+            gen._foo.srcjar.R.bool {}
+    public static final class color extends
+            gen._foo.srcjar.R.color {}
+    public static final class dimen extends
+            gen._foo.srcjar.R.dimen {}
+    public static final class drawable extends
+            gen._foo.srcjar.R.drawable {}
+    public static final class font extends
+            gen._foo.srcjar.R.font {}
+    public static final class fraction extends
+            gen._foo.srcjar.R.fraction {}
+    public static final class id extends
+            gen._foo.srcjar.R.id {}
+    public static final class integer extends
+            gen._foo.srcjar.R.integer {}
+    public static final class interpolator extends
+            gen._foo.srcjar.R.interpolator {}
+    public static final class layout extends
+            gen._foo.srcjar.R.layout {}
+    public static final class menu extends
+            gen._foo.srcjar.R.menu {}
+    public static final class mipmap extends
+            gen._foo.srcjar.R.mipmap {}
+    public static final class plurals extends
+            gen._foo.srcjar.R.plurals {}
+    public static final class raw extends
+            gen._foo.srcjar.R.raw {}
+    public static final class string extends
+            gen._foo.srcjar.R.string {}
+    public static final class style extends
+            gen._foo.srcjar.R.style {}
+    public static final class styleable extends
+            gen._foo.srcjar.R.styleable {}
+    public static final class transition extends
+            gen._foo.srcjar.R.transition {}
+    public static final class xml extends
+            gen._foo.srcjar.R.xml {}
+    public static void onResourcesLoaded(int packageId) {
+        gen._foo.srcjar.R.onResourcesLoaded(packageId);
+    }
+}'''
+
+_TEST_STYLEABLES_ROOT_R_JAVA = '''/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
+
+package gen._foo.srcjar;
+
+public final class R {
+    public static class anim  {
+        public static int abc_fade_in = 0x7f050000;
+    }
+    public static class animator  {
+    }
+    public static class array  {
+    }
+    public static class attr  {
+        public static int actionBarStyle = 0x7f0100e2;
+    }
+    public static class bool  {
+    }
+    public static class color  {
+    }
+    public static class dimen  {
+    }
+    public static class drawable  {
+    }
+    public static class font  {
+    }
+    public static class fraction  {
+    }
+    public static class id  {
+    }
+    public static class integer  {
+    }
+    public static class interpolator  {
+    }
+    public static class layout  {
+    }
+    public static class menu  {
+    }
+    public static class mipmap  {
+    }
+    public static class plurals  {
+    }
+    public static class raw  {
+    }
+    public static class string  {
+        public static int app_name = 0x7f0c0105;
+    }
+    public static class style  {
+    }
+    public static class styleable  {
+        public static int[] SnackbarLayout = { 0x0101011f, 0x7f010076 };
+        public static int SnackbarLayout_android_maxWidth;
+        public static int SnackbarLayout_elevation = 1;
+    }
+    public static class transition  {
+    }
+    public static class xml  {
+    }
+}'''
+
+_TEST_GRANDPARENT_ROOT_R_JAVA = '''/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
+
+package gen._foo.srcjar;
+
+public final class R {
+    public static class anim extends gen.base_module.R.anim  {
+        public static final int abc_fade_in = 0x7f050000;
+    }
+    public static class animator extends gen.base_module.R.animator  {
+    }
+    public static class array extends gen.base_module.R.array  {
+    }
+    public static class attr extends gen.base_module.R.attr  {
+        public static final int actionBarStyle = 0x7f0100e2;
+    }
+    public static class bool extends gen.base_module.R.bool  {
+    }
+    public static class color extends gen.base_module.R.color  {
+    }
+    public static class dimen extends gen.base_module.R.dimen  {
+    }
+    public static class drawable extends gen.base_module.R.drawable  {
+    }
+    public static class font extends gen.base_module.R.font  {
+    }
+    public static class fraction extends gen.base_module.R.fraction  {
+    }
+    public static class id extends gen.base_module.R.id  {
+    }
+    public static class integer extends gen.base_module.R.integer  {
+    }
+    public static class interpolator extends gen.base_module.R.interpolator  {
+    }
+    public static class layout extends gen.base_module.R.layout  {
+    }
+    public static class menu extends gen.base_module.R.menu  {
+    }
+    public static class mipmap extends gen.base_module.R.mipmap  {
+    }
+    public static class plurals extends gen.base_module.R.plurals  {
+    }
+    public static class raw extends gen.base_module.R.raw  {
+    }
+    public static class string extends gen.base_module.R.string  {
+        public static final int app_name = 0x7f0c0105;
+    }
+    public static class style extends gen.base_module.R.style  {
+    }
+    public static class styleable extends gen.base_module.R.styleable  {
+        public static final int[] SnackbarLayout = { 0x0101011f, 0x7f010076 };
+        public static final int SnackbarLayout_android_maxWidth = 0;
+        public static final int SnackbarLayout_elevation = 1;
+    }
+    public static class transition extends gen.base_module.R.transition  {
+    }
+    public static class xml extends gen.base_module.R.xml  {
+    }
+}'''
+
+_TEST_FAKE_ROOT_R_JAVA = '''/* AUTO-GENERATED FILE.  DO NOT MODIFY. */
+
+package gen._foo.srcjar;
+
+public final class R {
+    public static class anim  {
+        public static int abc_fade_in = 0x7f050000;
+    }
+    public static class animator  {
+    }
+    public static class array  {
+    }
+    public static class attr  {
+        public static int actionBarStyle = 0x7f0100e2;
+    }
+    public static class bool  {
+    }
+    public static class color  {
+    }
+    public static class dimen  {
+    }
+    public static class drawable  {
+    }
+    public static class font  {
+    }
+    public static class fraction  {
+    }
+    public static class id  {
+    }
+    public static class integer  {
+    }
+    public static class interpolator  {
+    }
+    public static class layout  {
+    }
+    public static class menu  {
+    }
+    public static class mipmap  {
+    }
+    public static class plurals  {
+    }
+    public static class raw  {
+    }
+    public static class string  {
+        public static int app_name = 0x7f0c0105;
+    }
+    public static class style  {
+    }
+    public static class styleable  {
+        public static final int SnackbarLayout_android_maxWidth = 0;
+        public static final int SnackbarLayout_elevation = 1;
+        public static int[] SnackbarLayout = { 0x0101011f, 0x7f010076 };
+    }
+    public static class transition  {
+    }
+    public static class xml  {
+    }
+    public static void onResourcesLoaded(int packageId) {
+    }
+}'''
+
+
 def _CreateTestFile(tmp_dir, file_name, file_data):
   file_path = os.path.join(tmp_dir, file_name)
   with open(file_path, 'wt') as f:
@@ -119,6 +643,24 @@ class ResourceUtilsTest(unittest.TestCase):
           resource_utils.GetRTxtStringResourceNames(tmp_file),
           _TEST_R_TXT_STRING_RESOURCE_NAMES)
 
+  def test_GetRTxtStringResourceNamesUnexpectedLine(self):
+    bad_lines = [
+        'long string foo 0x7f0c0108',
+        'int string foo ',
+        'int  string foo 0x7f0c0108',
+        'int string  foo 0x7f0c0108',
+        'int string foo-bar 0x7f0c0108',
+        'int string foo',
+    ]
+    with build_utils.TempDir() as tmp_dir:
+      for bad_line in bad_lines:
+        tmp_file = _CreateTestFile(tmp_dir, "test_R.txt",
+                                   _TEST_R_TXT + bad_line + '\n')
+        with self.assertRaises(Exception, msg=bad_line):
+          resource_utils.GetRTxtStringResourceNames(tmp_file)
+        with self.assertRaises(Exception, msg=bad_line):
+          list(resource_utils._ParseTextSymbolsFile(tmp_file))
+
   def test_GenerateStringResourcesAllowList(self):
     with build_utils.TempDir() as tmp_dir:
       tmp_module_rtxt_file = _CreateTestFile(tmp_dir, "test_R.txt", _TEST_R_TXT)
@@ -129,6 +671,103 @@ class ResourceUtilsTest(unittest.TestCase):
               tmp_module_rtxt_file, tmp_allowlist_rtxt_file),
           _TEST_R_TEXT_RESOURCES_IDS)
 
+  def _CheckCreateRJavaFiles(self, rjava_build_options, expected_root_r_java,
+                             expected_package_r_java, **kwargs):
+    with build_utils.TempDir() as tmp_dir:
+      r_txt_file = _CreateTestFile(tmp_dir, 'R.txt', _TEST_R_JAVA_R_TXT)
+      srcjar_dir = os.path.join(tmp_dir, 'srcjar')
+      resource_utils.CreateRJavaFiles(srcjar_dir, 'org.chromium.foo',
+                                      r_txt_file, ['org.chromium.bar'],
+                                      rjava_build_options, 'gen/foo.srcjar',
+                                      **kwargs)
+      self._CheckTestResourceFile(
+          os.path.join(srcjar_dir, 'gen', '_foo', 'srcjar', 'R.java'),
+          expected_root_r_java)
+      self._CheckTestResourceFile(
+          os.path.join(srcjar_dir, 'org', 'chromium', 'foo', 'R.java'),
+          expected_package_r_java)
+      self._CheckTestResourceFile(
+          os.path.join(srcjar_dir, 'org', 'chromium', 'bar', 'R.java'),
+          expected_package_r_java.replace('package org.chromium.foo;',
+                                          'package org.chromium.bar;'))
+
+  def test_CreateRJavaFiles(self):
+    self._CheckCreateRJavaFiles(resource_utils.RJavaBuildOptions(),
+                                _TEST_ROOT_R_JAVA, _TEST_PACKAGE_R_JAVA)
+
+  def test_CreateRJavaFilesExportAllStyleables(self):
+    # Non-final styleable indices with a value of 0 are left uninitialized.
+    rjava_build_options = resource_utils.RJavaBuildOptions()
+    rjava_build_options.ExportAllResources()
+    rjava_build_options.ExportAllStyleables()
+    self._CheckCreateRJavaFiles(rjava_build_options,
+                                _TEST_STYLEABLES_ROOT_R_JAVA,
+                                _TEST_PACKAGE_R_JAVA)
+
+  def test_CreateRJavaFilesGrandparentPackage(self):
+    self._CheckCreateRJavaFiles(resource_utils.RJavaBuildOptions(),
+                                _TEST_GRANDPARENT_ROOT_R_JAVA,
+                                _TEST_PACKAGE_R_JAVA,
+                                grandparent_custom_package_name='base')
+
+  def test_CreateRJavaFilesFakeOnResourcesLoaded(self):
+    rjava_build_options = resource_utils.RJavaBuildOptions()
+    rjava_build_options.ExportAllResources()
+    rjava_build_options.GenerateOnResourcesLoaded(fake=True)
+    self._CheckCreateRJavaFiles(rjava_build_options,
+                                _TEST_FAKE_ROOT_R_JAVA,
+                                _TEST_SHARED_PACKAGE_R_JAVA)
+
+  def test_CreateRJavaFilesOnResourcesLoaded(self):
+    rjava_build_options = resource_utils.RJavaBuildOptions()
+    rjava_build_options.ExportAllResources()
+    rjava_build_options.GenerateOnResourcesLoaded()
+    self._CheckCreateRJavaFiles(rjava_build_options, _TEST_SHARED_ROOT_R_JAVA,
+                                _TEST_SHARED_PACKAGE_R_JAVA)
+
+  @staticmethod
+  def _CreateTestDepZips(tmp_dir):
+    """Returns (dep_zips, deps_dir, expected_subdirs_per_zip)."""
+    dep_zips = []
+    for name in ('a', 'b', 'c', 'd'):
+      dep_zip = os.path.join(tmp_dir, name + '.zip')
+      with zipfile.ZipFile(dep_zip, 'w') as z:
+        if name == 'c':
+          # Zip created by prepare_resources.py for several res/ dirs.
+          z.writestr('0_res/values/strings.xml', '')
+          z.comment = resource_utils.MULTIPLE_RES_MAGIC_STRING
+        else:
+          z.writestr('values/strings.xml', '')
+      dep_zips.append(dep_zip)
+    deps_dir = os.path.join(tmp_dir, 'deps')
+    expected_subdirs_per_zip = []
+    for dep_zip in dep_zips:
+      subdirname = dep_zip.replace(os.path.sep, '_')
+      subdir = os.path.join(deps_dir, subdirname)
+      if dep_zip.endswith('c.zip'):
+        subdir = os.path.join(subdir, subdirname + '_0_res')
+      expected_subdirs_per_zip.append([subdir])
+    return dep_zips, deps_dir, expected_subdirs_per_zip
+
+  def test_ExtractDeps(self):
+    with build_utils.TempDir() as tmp_dir:
+      dep_zips, deps_dir, expected_subdirs_per_zip = (
+          self._CreateTestDepZips(tmp_dir))
+      expected_subdirs = [s for l in expected_subdirs_per_zip for s in l]
+      self.assertListEqual(resource_utils.ExtractDeps(dep_zips, deps_dir),
+                           expected_subdirs)
+      for subdir in expected_subdirs:
+        self.assertTrue(
+            os.path.exists(os.path.join(subdir, 'values', 'strings.xml')))
+
+  def test_ExtractDepsPerZip(self):
+    with build_utils.TempDir() as tmp_dir:
+      dep_zips, deps_dir, expected_subdirs_per_zip = (
+          self._CreateTestDepZips(tmp_dir))
+      self.assertListEqual(
+          resource_utils.ExtractDepsPerZip(dep_zips, deps_dir),
+          expected_subdirs_per_zip)
+
   def test_IsAndroidLocaleQualifier(self):
     good_locales = [
         'en',
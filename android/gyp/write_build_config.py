@@ -583,6 +583,12 @@ import os
 import sys
 import xml.dom.minidom
 
+try:
+  # Python 2 only uses the C parser when asked to explicitly.
+  from xml.etree import cElementTree as ElementTree
+except ImportError:
+  from xml.etree import ElementTree
+
 from util import build_utils
 from util import resource_utils
 
@@ -642,6 +648,19 @@ class AndroidManifest(object):
     return self.manifest.getAttribute('package')
 
 
+def _ExtractPackageFromManifest(manifest_path):
+  """Returns the package name of an AndroidManifest.xml.
+
+  Cheaper than AndroidManifest(manifest_path).GetPackageName(), since it uses
+  the C ElementTree parser rather than building a DOM.
+  """
+  root = ElementTree.parse(manifest_path).getroot()
+  if root.tag != 'manifest':
+    raise Exception('Expected a <manifest> root element in %s, found <%s>' %
+                    (manifest_path, root.tag))
+  return root.get('package', '')
+
+
 dep_config_cache = {}
 def GetDepConfig(path):
   if not path in dep_config_cache:
@@ -1379,8 +1398,8 @@ def main(argv):
     if options.srcjar:
       deps_info['srcjar'] = options.srcjar
     if options.android_manifest:
-      manifest = AndroidManifest(options.android_manifest)
-      deps_info['package_name'] = manifest.GetPackageName()
+      deps_info['package_name'] = _ExtractPackageFromManifest(
+          options.android_manifest)
     if options.package_name:
       deps_info['package_name'] = options.package_name
     deps_info['res_sources_path'] = ''
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# Copyright 2020 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+import os
+import unittest
+
+import write_build_config
+from util import build_utils
+
+
+class WriteBuildConfigTest(unittest.TestCase):
+
+  def _ExtractPackage(self, manifest_data):
+    with build_utils.TempDir() as tmp_dir:
+      manifest_path = os.path.join(tmp_dir, 'AndroidManifest.xml')
+      with open(manifest_path, 'w') as f:
+        f.write(manifest_data)
+      return write_build_config._ExtractPackageFromManifest(manifest_path)
+
+  def test_ExtractPackageFromManifest(self):
+    self.assertEqual(
+        self._ExtractPackage(
+            '<manifest package="org.x"><application/></manifest>'), 'org.x')
+    self.assertEqual(self._ExtractPackage('<manifest/>'), '')
+
+  def test_ExtractPackageFromManifestMalformed(self):
+    with self.assertRaises(Exception):
+      self._ExtractPackage('<manifest package="org.x"><application>')
+
+  def test_ExtractPackageFromManifestWrongRoot(self):
+    with self.assertRaises(Exception):
+      self._ExtractPackage('<resources package="org.y"/>')
+
+
+if __name__ == '__main__':
+  unittest.main()